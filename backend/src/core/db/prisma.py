@@ -39,4 +39,7 @@ async def lifespan(app: FastAPI):
         yield
     finally:
         # Shutdown
+        from src.core.services.llm_service import llm_service
+        await llm_service.close()
+        await ocr_service.close()
         await disconnect()
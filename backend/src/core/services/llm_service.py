@@ -1,3 +1,4 @@
+import asyncio
 import httpx
 import time
 from typing import List, Dict, Any
@@ -11,12 +12,40 @@ class LLMService:
         # Modal Labs endpoint URL (you'll need to add this to settings)
         self.base_url = settings.MODAL_LLM_ENDPOINT
         self.timeout = 120.0  # 2 minutes timeout for LLM requests
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared httpx client, creating it on first use.
+
+        Reusing one client keeps connections to the Modal endpoint alive across
+        requests instead of paying a TCP+TLS handshake for every analysis.
+        """
+        if self._client is None or self._client.is_closed:
+            # Configure httpx with explicit timeouts and connection settings
+            timeout_config = httpx.Timeout(
+                timeout=self.timeout,
+                connect=10.0,  # 10 seconds for connection
+                read=self.timeout,
+                write=10.0,
+                pool=5.0
+            )
+            self._client = httpx.AsyncClient(
+                timeout=timeout_config,
+                limits=httpx.Limits(max_keepalive_connections=32),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the shared httpx client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def analyze_document_text(self, text: str) -> Dict[str, Any]:
         """
         Analyze document text using Modal Labs LLM endpoint.
         
-        This sends four separate requests to analyze:
+        This sends four concurrent requests to analyze:
         1. Fraud detection
         2. Spelling mistakes
         3. Document type classification
@@ -32,38 +61,24 @@ class LLMService:
             Exception: If LLM analysis fails
         """
         try:
-            print(f"[DEBUG] Creating httpx client with timeout={self.timeout}s...")
-            start = time.time()
-            # Configure httpx with explicit timeouts and connection settings
-            timeout_config = httpx.Timeout(
-                timeout=self.timeout,
-                connect=10.0,  # 10 seconds for connection
-                read=self.timeout,
-                write=10.0,
-                pool=5.0
+            client = self._get_client()
+
+            # All four requests are independent, so issue them concurrently and
+            # pay a single round-trip instead of four sequential ones
+            fraud_result, mistakes_result, doc_type_result, summary_result = await asyncio.gather(
+                self._detect_fraud(client, text),
+                self._detect_mistakes(client, text),
+                self._classify_document(client, text),
+                self._generate_summary(client, text),
             )
-            async with httpx.AsyncClient(timeout=timeout_config) as client:
-                print(f"[DEBUG] httpx client created in {time.time() - start:.2f}s")
-                
-                # Request 1: Fraud detection
-                fraud_result = await self._detect_fraud(client, text)
-                
-                # Request 2: Spelling mistakes
-                mistakes_result = await self._detect_mistakes(client, text)
-                
-                # Request 3: Document type
-                doc_type_result = await self._classify_document(client, text)
-                
-                # Request 4: Document summary
-                summary_result = await self._generate_summary(client, text)
-                
-                return {
-                    "fraudSentences": fraud_result,
-                    "mistakeWords": mistakes_result,
-                    "documentType": doc_type_result,
-                    "documentSummary": summary_result
-                }
-                
+
+            return {
+                "fraudSentences": fraud_result,
+                "mistakeWords": mistakes_result,
+                "documentType": doc_type_result,
+                "documentSummary": summary_result
+            }
+
         except Exception as e:
             raise Exception(f"LLM analysis failed: {str(e)}")
 
@@ -17,6 +17,7 @@ class OCRService:
 
     def __init__(self):
         self._reader = None
+        self._client: httpx.AsyncClient | None = None
         
         if USE_MODAL_OCR:
             print("OCR Service configured to use Modal PaddleOCR HTTP endpoint")
@@ -31,6 +32,22 @@ class OCRService:
             print("EasyOCR reader initialized successfully.")
         return self._reader
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared httpx client for the Modal OCR endpoint, creating it on first use.
+
+        Reusing one client keeps the connection alive across PDFs instead of paying
+        a TCP+TLS handshake for every OCR call.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=300.0)
+        return self._client
+
+    async def close(self) -> None:
+        """Close the shared httpx client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     async def extract_text_from_pdf(self, pdf_bytes: bytes) -> str:
         """
         Extract text from a PDF using OCR. Optimized for Russian scanned documents.
@@ -50,15 +67,16 @@ class OCRService:
                 if not MODAL_OCR_ENDPOINT:
                     raise Exception("MODAL_OCR_ENDPOINT not configured")
                 
-                async with httpx.AsyncClient(timeout=300.0) as client:
-                    # Send PDF as multipart form data
-                    files = {"file": ("document.pdf", pdf_bytes, "application/pdf")}
-                    response = await client.post(
-                        f"{MODAL_OCR_ENDPOINT}/extract-text-from-pdf",
-                        files=files
-                    )
-                    response.raise_for_status()
-                    result = response.json()
+                client = self._get_client()
+                
+                # Send PDF as multipart form data
+                files = {"file": ("document.pdf", pdf_bytes, "application/pdf")}
+                response = await client.post(
+                    f"{MODAL_OCR_ENDPOINT}/extract-text-from-pdf",
+                    files=files
+                )
+                response.raise_for_status()
+                result = response.json()
                 
                 # Check for errors
                 if result.get("errors"):
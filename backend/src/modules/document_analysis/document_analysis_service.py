@@ -2,6 +2,7 @@ from typing import Dict, Any
 from datetime import datetime
 import time
 from prisma import Prisma
+from src.core.db.prisma import get_db
 from src.core.s3.s3_service import s3_service
 from src.core.services.ocr_service import ocr_service
 from src.core.services.llm_service import llm_service
@@ -32,15 +33,10 @@ class DocumentAnalysisService:
             Exception: If any step of the analysis fails
         """
         analysis_id = None
-        db = Prisma()
+        # Shared app-lifetime client; avoids a fresh connect/disconnect per analysis
+        db = await get_db()
         
         try:
-            # Connect to database
-            print(f"[DEBUG] Starting database connection...")
-            start = time.time()
-            await db.connect()
-            print(f"[DEBUG] Database connected in {time.time() - start:.2f}s")
-            
             # Step 1: Create initial database record with PROCESSING status
             print(f"[DEBUG] Creating analysis record...")
             start = time.time()
@@ -122,10 +118,6 @@ class DocumentAnalysisService:
                 except:
                     pass  # Best effort to update status
             raise
-            
-        finally:
-            # Ensure database connection is closed
-            await db.disconnect()
 
     async def get_analysis_status(self, document_id: str) -> Dict[str, Any]:
         """
@@ -137,43 +129,38 @@ class DocumentAnalysisService:
         Returns:
             Analysis status and results if available
         """
-        db = Prisma()
+        db = await get_db()
+
+        # Accept either numeric id or legacy prefix; normalize to numeric string
         try:
-            await db.connect()
-            
-            # Accept either numeric id or legacy prefix; normalize to numeric string
-            try:
-                key = str(int(document_id.split('/')[-1]))
-            except ValueError:
-                key = document_id
+            key = str(int(document_id.split('/')[-1]))
+        except ValueError:
+            key = document_id
 
-            analysis = await db.documentanalysis.find_unique(where={"documentId": key})
-            
-            if not analysis:
-                return {
-                    "status": "NOT_FOUND",
-                    "message": "No analysis found for this document"
-                }
-            
-            result = {
-                "status": analysis.status,
-                "documentId": analysis.documentId
+        analysis = await db.documentanalysis.find_unique(where={"documentId": key})
+
+        if not analysis:
+            return {
+                "status": "NOT_FOUND",
+                "message": "No analysis found for this document"
             }
-            
-            if analysis.status == "COMPLETED":
-                result.update({
-                    "fraudSentences": analysis.fraudSentences,
-                    "mistakeWords": analysis.mistakeWords,
-                    "documentType": analysis.documentType,
-                    "documentSummary": analysis.documentSummary
-                })
-            elif analysis.status == "FAILED":
-                result["errorLog"] = analysis.errorLog
-            
-            return result
-            
-        finally:
-            await db.disconnect()
+
+        result = {
+            "status": analysis.status,
+            "documentId": analysis.documentId
+        }
+
+        if analysis.status == "COMPLETED":
+            result.update({
+                "fraudSentences": analysis.fraudSentences,
+                "mistakeWords": analysis.mistakeWords,
+                "documentType": analysis.documentType,
+                "documentSummary": analysis.documentSummary
+            })
+        elif analysis.status == "FAILED":
+            result["errorLog"] = analysis.errorLog
+
+        return result
 
     async def _update_failed_status(self, db: Prisma, analysis_id: str, error_message: str):
         """Update the analysis record with failed status and error log."""
@@ -5,6 +5,7 @@ from typing import List
 from src.modules.sessions.types import (
     SessionDTO,
     SessionDocumentDTO,
+    SessionDocumentDetailsDto,
     SessionDocumentStatus,
 )
 from src.modules.sessions.labels_payload import LabelsPositionPayload
@@ -19,33 +20,35 @@ def map_session_to_dto(session) -> SessionDTO:
     )
 
 
-def map_document_to_dto(doc) -> SessionDocumentDTO:
-    # Resolve documentUrl from labelsPosition if available
-    artifacts_url = None
-    if doc.labelsPosition:
-        # Try legacy payload first
+def _resolve_artifact_url(labels_position, key: str) -> str | None:
+    if not labels_position:
+        return None
+    # Try legacy payload first
+    try:
+        payload = LabelsPositionPayload.model_validate(labels_position)
+        return getattr(payload.artifacts, key)
+    except Exception:
+        # Fallback to challenge JSON shape with embedded artifacts
+        lp = labels_position
         try:
-            payload = LabelsPositionPayload.model_validate(doc.labelsPosition)
-            artifacts_url = payload.artifacts.originalPdfUrl
+            if isinstance(lp, dict):
+                # Direct artifacts on root
+                if "artifacts" in lp and isinstance(lp["artifacts"], dict):
+                    return lp["artifacts"].get(key)
+                # Nested under safe key
+                first_val = next(iter(lp.values())) if lp else None
+                if isinstance(first_val, dict) and "artifacts" in first_val:
+                    art = first_val["artifacts"]
+                    if isinstance(art, dict):
+                        return art.get(key)
         except Exception:
-            # Fallback to challenge JSON shape with embedded artifacts
-            lp = doc.labelsPosition
-            try:
-                if isinstance(lp, dict):
-                    # Direct artifacts on root
-                    if "artifacts" in lp and isinstance(lp["artifacts"], dict):
-                        artifacts_url = lp["artifacts"].get("originalPdfUrl")
-                    else:
-                        # Nested under safe key
-                        first_val = next(iter(lp.values())) if lp else None
-                        if isinstance(first_val, dict) and "artifacts" in first_val:
-                            art = first_val["artifacts"]
-                            if isinstance(art, dict):
-                                artifacts_url = art.get("originalPdfUrl")
-            except Exception:
-                artifacts_url = None
-
-    return SessionDocumentDTO(
+            return None
+    return None
+
+
+def _document_fields(doc) -> dict:
+    artifacts_url = _resolve_artifact_url(doc.labelsPosition, "originalPdfUrl")
+    return dict(
         id=str(doc.id),
         document_url=artifacts_url or doc.documentId,
         original_name=doc.originalName,
@@ -59,3 +62,16 @@ def map_document_to_dto(doc) -> SessionDocumentDTO:
         },
         labels_position=doc.labelsPosition if doc.labelsPosition else None,
     )
+
+
+def map_document_to_dto(doc) -> SessionDocumentDTO:
+    return SessionDocumentDTO(**_document_fields(doc))
+
+
+def map_document_to_details_dto(doc) -> SessionDocumentDetailsDto:
+    # Built in a single pass so FastAPI serializes the instance as-is instead of
+    # dumping and re-validating an intermediate dict
+    return SessionDocumentDetailsDto(
+        **_document_fields(doc),
+        labeled_document_url=_resolve_artifact_url(doc.labelsPosition, "labeledPdfUrl"),
+    )
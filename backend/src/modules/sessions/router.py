@@ -3,11 +3,16 @@ from __future__ import annotations
 from pathlib import Path
 from typing import List
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, UploadFile, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, File, UploadFile, HTTPException, Query, Response
 from prisma import Prisma
+from pydantic import TypeAdapter
 
 from src.core.db.prisma import get_db
-from src.modules.sessions.dto_mappers import map_document_to_dto, map_session_to_dto
+from src.modules.sessions.dto_mappers import (
+    map_document_to_details_dto,
+    map_document_to_dto,
+    map_session_to_dto,
+)
 from src.modules.sessions.service import create_session_with_documents
 from src.modules.sessions.types import (
     SessionDTO,
@@ -15,7 +20,6 @@ from src.modules.sessions.types import (
     SessionDocumentDetailsDto,
     SessionDocumentStatus,
 )
-from src.modules.sessions.labels_payload import LabelsPositionPayload
 
 router = APIRouter(
     prefix="/sessions",    
@@ -25,21 +29,31 @@ router = APIRouter(
 
 WORK_ROOT = Path.cwd() / "work_dir"
 
+# List endpoints serialize in one pydantic-core call instead of letting FastAPI
+# re-validate every element against response_model
+SESSION_LIST_ADAPTER = TypeAdapter(List[SessionDTO])
+DOCUMENT_LIST_ADAPTER = TypeAdapter(List[SessionDocumentDTO])
+DOCUMENT_DETAILS_LIST_ADAPTER = TypeAdapter(List[SessionDocumentDetailsDto])
+
 
-@router.get("", response_model=List[SessionDTO])
+@router.get("", response_model=None, responses={200: {"model": List[SessionDTO]}})
 async def list_sessions(
     status: str | None = Query(
         None,
         description="Filter by session status: PROCESSING|FAILED|SUCCESS",
     ),
     db: Prisma = Depends(get_db),
-) -> List[SessionDTO]:
+) -> Response:
     where = {"status": status} if status else None
     sessions = await db.session.find_many(
         where=where,
         order={"createdAt": "desc"},
     )
-    return [map_session_to_dto(s) for s in sessions]
+    dtos = [map_session_to_dto(s) for s in sessions]
+    return Response(
+        content=SESSION_LIST_ADAPTER.dump_json(dtos, by_alias=True),
+        media_type="application/json",
+    )
 
 
 @router.get("/{session_id}", response_model=SessionDTO)
@@ -53,12 +67,16 @@ async def get_session(
     return map_session_to_dto(s)
 
 
-@router.get("/{session_id}/documents", response_model=List[SessionDocumentDTO])
+@router.get(
+    "/{session_id}/documents",
+    response_model=None,
+    responses={200: {"model": List[SessionDocumentDTO]}},
+)
 async def list_session_documents(
     session_id: int,
     status: SessionDocumentStatus | None = Query(None),
     db: Prisma = Depends(get_db),
-) -> List[SessionDocumentDTO]:
+) -> Response:
 
     where = {"sessionId": session_id}
     if status:
@@ -66,7 +84,11 @@ async def list_session_documents(
     docs = await db.sessiondocument.find_many(
         where=where, order={"createdAt": "desc"}
     )
-    return [map_document_to_dto(d) for d in docs]
+    dtos = [map_document_to_dto(d) for d in docs]
+    return Response(
+        content=DOCUMENT_LIST_ADAPTER.dump_json(dtos, by_alias=True),
+        media_type="application/json",
+    )
 
 
 @router.get("/{session_id}/documents/labels-map")
@@ -132,6 +154,32 @@ async def get_session_documents_labels_map(
     return result
 
 
+@router.get(
+    "/{session_id}/documents:batch",
+    response_model=None,
+    responses={200: {"model": List[SessionDocumentDetailsDto]}},
+)
+async def get_session_documents_batch(
+    session_id: int,
+    ids: List[int] = Query(..., description="Document ids to fetch"),
+    db: Prisma = Depends(get_db),
+) -> Response:
+    """Return details for several documents of a session in one query.
+
+    Documents that do not exist or belong to another session are omitted;
+    the rest keep the order of `ids`.
+    """
+    docs = await db.sessiondocument.find_many(
+        where={"id": {"in": ids}, "sessionId": session_id}
+    )
+    by_id = {d.id: d for d in docs}
+    dtos = [map_document_to_details_dto(by_id[i]) for i in dict.fromkeys(ids) if i in by_id]
+    return Response(
+        content=DOCUMENT_DETAILS_LIST_ADAPTER.dump_json(dtos, by_alias=True),
+        media_type="application/json",
+    )
+
+
 @router.get("/{session_id}/documents/{doc_id}", response_model=SessionDocumentDetailsDto)
 async def get_session_document(
     session_id: int,
@@ -142,32 +190,7 @@ async def get_session_document(
     if not d or d.sessionId != session_id:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    base = map_document_to_dto(d).model_dump(by_alias=True)
-    labeled = None
-    if d.labelsPosition:
-        # Try legacy payload first
-        try:
-            payload = LabelsPositionPayload.model_validate(d.labelsPosition)
-            labeled = payload.artifacts.labeledPdfUrl
-        except Exception:
-            # Fallback to challenge JSON shape with embedded artifacts
-            lp = d.labelsPosition
-            try:
-                if isinstance(lp, dict):
-                    if "artifacts" in lp and isinstance(lp["artifacts"], dict):
-                        labeled = lp["artifacts"].get("labeledPdfUrl")
-                    else:
-                        first_val = next(iter(lp.values())) if lp else None
-                        if isinstance(first_val, dict) and "artifacts" in first_val:
-                            art = first_val["artifacts"]
-                            if isinstance(art, dict):
-                                labeled = art.get("labeledPdfUrl")
-            except Exception:
-                labeled = None
-    base["labeledDocumentUrl"] = labeled
-    # Expose raw labelsPosition JSON (challenge format or legacy) in DTO
-    base["labelsPosition"] = d.labelsPosition if d.labelsPosition else None
-    return base
+    return map_document_to_details_dto(d)
 
 
 @router.post("", response_model=SessionDTO)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import io
+import os
 import zipfile
 from pathlib import Path
 from typing import List, Tuple
@@ -26,14 +28,16 @@ async def create_session_with_documents(files: List[UploadFile], background: Bac
 
     pdf_blobs: List[Tuple[str, bytes]] = []
     for f in files:
+        name = f.filename or ""
+        ext = os.path.splitext(name.lower())[1]
+        if ext not in (".zip", ".pdf"):
+            # skip non-pdf
+            continue
         data = await f.read()
-        if f.filename and f.filename.lower().endswith(".zip"):
+        if ext == ".zip":
             pdf_blobs.extend(_collect_pdfs_from_zip(data))
-        elif f.filename and f.filename.lower().endswith(".pdf"):
-            pdf_blobs.append((Path(f.filename).name, data))
         else:
-            # skip non-pdf
-            continue
+            pdf_blobs.append((Path(name).name, data))
 
     if not pdf_blobs:
         raise HTTPException(status_code=400, detail="No PDFs found in upload")
@@ -46,8 +50,9 @@ async def create_session_with_documents(files: List[UploadFile], background: Bac
         }
     )
 
-    # Create docs and schedule background processing
-    for original_name, blob in pdf_blobs:
+    # Create doc records first so their ids are known
+    docs = []
+    for original_name, _ in pdf_blobs:
         doc = await db.sessiondocument.create(
             data={
                 "originalName": original_name,
@@ -56,13 +61,18 @@ async def create_session_with_documents(files: List[UploadFile], background: Bac
                 "status": "PENDING",
             }
         )
+        docs.append(doc)
 
-        # write blob to temp file under work_root
-        doc_temp_dir = work_root / "uploads" / str(session.id)
-        doc_temp_dir.mkdir(parents=True, exist_ok=True)
-        temp_path = doc_temp_dir / f"{doc.id}.pdf"
-        temp_path.write_bytes(blob)
+    # write blobs to temp files under work_root concurrently
+    doc_temp_dir = work_root / "uploads" / str(session.id)
+    doc_temp_dir.mkdir(parents=True, exist_ok=True)
+    temp_paths = [doc_temp_dir / f"{doc.id}.pdf" for doc in docs]
+    await asyncio.gather(
+        *(asyncio.to_thread(path.write_bytes, blob) for path, (_, blob) in zip(temp_paths, pdf_blobs))
+    )
 
+    # Schedule background processing
+    for doc, temp_path in zip(docs, temp_paths):
         background.add_task(process_document_async, session.id, doc.id, temp_path, work_root)
 
     return session.id
@@ -2,35 +2,118 @@
 Client for Russian Document Analysis Service
 """
 
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+
 import modal
 
+# Results are pure functions of the input, so identical documents (re-uploads,
+# retries after failure) are answered from this cache without a remote call
+CACHE_MAX_ENTRIES = 1024
+_results_cache: OrderedDict[str, dict] = OrderedDict()
+# Guards the cache and the in-flight table; never held across a remote call
+_cache_lock = threading.Lock()
+# Keys whose remote call is running, so concurrent misses wait instead of repeating it
+_inflight: dict[str, Future] = {}
+
+
+@lru_cache(maxsize=1)
+def _analyzer():
+    """Look up the deployed analyzer once and reuse the handle for every call"""
+    app = modal.App.lookup("russian-document-analyzer", create_if_missing=False)
+    return app.cls["QwenDocumentAnalyzer"]()
+
+
+def _cache_key(func_name: str, text: str, *args) -> str:
+    """SHA-256 over the exact text and args, each length-prefixed so parts can't run together"""
+    h = hashlib.sha256()
+    for part in (text, *map(repr, args)):
+        data = part.encode()
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return f"{h.hexdigest()}:{func_name}"
+
+
+def _cached(func_name: str, text: str, call, *args):
+    """Return a cached result keyed by SHA-256 of the text, or run `call` and store it"""
+    key = _cache_key(func_name, text, *args)
+
+    with _cache_lock:
+        if key in _results_cache:
+            _results_cache.move_to_end(key)
+            return copy.deepcopy(_results_cache[key])
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+
+    if not owner:
+        return copy.deepcopy(future.result())
+
+    try:
+        result = call()
+    except BaseException as e:
+        with _cache_lock:
+            del _inflight[key]
+        future.set_exception(e)
+        raise
+
+    with _cache_lock:
+        _results_cache[key] = result
+        if len(_results_cache) > CACHE_MAX_ENTRIES:
+            _results_cache.popitem(last=False)
+        del _inflight[key]
+    future.set_result(result)
+    return copy.deepcopy(result)
+
 
 def check_spelling(text: str):
     """Check Russian text for spelling errors"""
-    app = modal.App.lookup("russian-document-analyzer", create_if_missing=False)
-    analyzer = app.cls["QwenDocumentAnalyzer"]()
-    return analyzer.check_spelling.remote(text)
+    analyzer = _analyzer()
+    return _cached("check_spelling", text, lambda: analyzer.check_spelling.remote(text))
 
 
 def classify_document(document_text: str, custom_rules: str = ""):
     """Classify document type (Договор, Соглашение, Акт, Спецификация)"""
-    app = modal.App.lookup("russian-document-analyzer", create_if_missing=False)
-    analyzer = app.cls["QwenDocumentAnalyzer"]()
-    return analyzer.classify_document.remote(document_text, custom_rules)
+    analyzer = _analyzer()
+    return _cached(
+        "classify_document",
+        document_text,
+        lambda: analyzer.classify_document.remote(document_text, custom_rules),
+        custom_rules,
+    )
 
 
 def detect_fraud(document_text: str, custom_indicators: list[str] = None):
     """Detect potential fraud in document"""
-    app = modal.App.lookup("russian-document-analyzer", create_if_missing=False)
-    analyzer = app.cls["QwenDocumentAnalyzer"]()
-    return analyzer.detect_fraud.remote(document_text, custom_indicators)
+    analyzer = _analyzer()
+    return _cached(
+        "detect_fraud",
+        document_text,
+        lambda: analyzer.detect_fraud.remote(document_text, custom_indicators),
+        custom_indicators,
+    )
 
 
 def analyze_full(document_text: str, tasks: list[str] = None):
-    """Perform all analysis tasks"""
-    app = modal.App.lookup("russian-document-analyzer", create_if_missing=False)
-    analyzer = app.cls["QwenDocumentAnalyzer"]()
-    return analyzer.analyze_document_full.remote(document_text, tasks)
+    """Perform all analysis tasks in a single remote call
+
+    Prefer this over calling check_spelling / classify_document / detect_fraud
+    separately: one RPC instead of three.
+    """
+    if tasks is None:
+        tasks = ["spell_check", "classify", "fraud_detect"]
+    analyzer = _analyzer()
+    return _cached(
+        "analyze_full",
+        document_text,
+        lambda: analyzer.analyze_document_full.remote(document_text, tasks=tasks),
+        tasks,
+    )
 
 
 if __name__ == "__main__":
@@ -1,9 +1,22 @@
 """
 Client example for using the Modal LLM service
+
+Chat traffic is served by the same QwenDocumentAnalyzer container as document
+analysis, so both share one GPU worker and one continuous batch.
 """
 
+from functools import lru_cache
+
 import modal
 
+
+@lru_cache(maxsize=1)
+def _model():
+    """Look up the deployed analyzer once and reuse the handle for every call"""
+    app = modal.App.lookup("russian-document-analyzer", create_if_missing=False)
+    return app.cls["QwenDocumentAnalyzer"]()
+
+
 def query_llm(prompt: str, max_tokens: int = 512, temperature: float = 0.7):
     """
     Send a query to the deployed LLM model
@@ -16,12 +29,7 @@ def query_llm(prompt: str, max_tokens: int = 512, temperature: float = 0.7):
     Returns:
         dict with response data
     """
-    # Connect to the deployed Modal app
-    app = modal.App.lookup("russian-llm-qwen", create_if_missing=False)
-    
-    # Get the model class
-    QwenLLM = app.cls["QwenLLM"]
-    model = QwenLLM()
+    model = _model()
     
     # Generate response
     result = model.generate.remote(
@@ -44,9 +52,7 @@ def batch_query_llm(prompts: list[str], max_tokens: int = 512):
     Returns:
         list of dicts with response data
     """
-    app = modal.App.lookup("russian-llm-qwen", create_if_missing=False)
-    QwenLLM = app.cls["QwenLLM"]
-    model = QwenLLM()
+    model = _model()
     
     results = model.batch_generate.remote(
         prompts=prompts,
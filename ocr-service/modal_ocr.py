@@ -5,17 +5,20 @@ PaddleOCR is an open-source OCR tool that supports Russian and English
 
 import modal
 import io
+from contextlib import contextmanager
 from typing import List
 
 # Define the Modal app
 app = modal.App("paddleocr-service")
 
-# Define the image with PaddleOCR dependencies
+# Define the image with PaddleOCR dependencies. The plain paddlepaddle wheel is
+# CPU-only (PaddleOCR then silently drops use_gpu), so install the CUDA build on a
+# base image that ships the matching CUDA 12.0 / cuDNN 8 runtime libraries
 ocr_image = (
-    modal.Image.debian_slim(python_version="3.11")
+    modal.Image.from_registry("nvidia/cuda:12.0.1-cudnn8-runtime-ubuntu22.04", add_python="3.11")
     .apt_install("libgl1", "libglib2.0-0", "libgomp1")  # Required for OpenCV
     .pip_install(
-        "paddlepaddle==2.6.1",
+        "paddlepaddle-gpu==2.6.1",
         "paddleocr==2.7.3",
         "pillow==10.1.0",
         "numpy==1.24.3",
@@ -25,11 +28,114 @@ ocr_image = (
     )
 )
 
+# PaddleOCR caches downloaded det/rec/cls weights under ~/.paddleocr; keeping that
+# directory on a volume means cold starts load them from disk instead of the CDN
+MODELS_DIR = "/root/.paddleocr"
+ocr_models = modal.Volume.from_name("paddleocr-models", create_if_missing=True)
+
+# Independent PaddleOCR engines per container; concurrent inputs each check one
+# out instead of sharing (and racing on) a single set of Paddle predictors
+OCR_ENGINE_POOL_SIZE = 4
+
+# Image decode threads; also the number of decoded images allowed ahead of OCR
+DECODE_WORKERS = 4
+
+# Small pages (receipts, thumbnails) are packed onto shared detector canvases;
+# MOSAIC_TILE_MAX guarantees at least a 2x2 grid fits with gutters
+MOSAIC_SIZE = 960
+MOSAIC_GUTTER = 32
+MOSAIC_TILE_MAX = (MOSAIC_SIZE - MOSAIC_GUTTER) // 2
+MOSAIC_MIN_TILES = 4
+
+
+def _decode_or_none(image_bytes: bytes):
+    """
+    Decode encoded image bytes straight into the HxWx3 uint8 BGR array PaddleOCR expects
+    
+    cv2.imdecode (libjpeg-turbo / libpng) writes one contiguous buffer, so there is
+    no PIL decode, RGB conversion or extra np.array copy. Failures are returned
+    rather than raised so callers branch instead of catching.
+    
+    Returns:
+        (image_array, None) on success, (None, error message) otherwise
+    """
+    import cv2
+    import numpy as np
+    
+    if not image_bytes:
+        return None, "No image bytes provided"
+    
+    image_array = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if image_array is None:
+        return None, "Unsupported or corrupted image data"
+    return image_array, None
+
+
+def _pixmap_to_array(pix):
+    """
+    Wrap a rendered PyMuPDF pixmap (RGB, no alpha) as a BGR array without the
+    PNG encode + decode round trip
+    """
+    import cv2
+    import numpy as np
+    
+    rgb = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, pix.n)
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def _split_lines(ocr_lines):
+    """
+    Split PaddleOCR result lines ([[bbox, (text, confidence)], ...]) into the list
+    of texts and a float32 array of confidences
+    """
+    import numpy as np
+    
+    lines = [line[1] for line in ocr_lines if line]
+    texts = [text for text, _ in lines]
+    confidences = np.fromiter((confidence for _, confidence in lines), dtype=np.float32, count=len(lines))
+    return texts, confidences
+
+
+def _pack_mosaics(pages: list, page_indices: List[int]) -> list:
+    """
+    Shelf-pack the given small pages onto white MOSAIC_SIZE canvases,
+    separated by MOSAIC_GUTTER so detections can't bridge two pages
+    
+    Returns:
+        List of (canvas, [(page_idx, x, y), ...]) with each tile's top-left offset
+    """
+    import numpy as np
+    
+    layouts = []
+    tiles, x, y, row_height = [], 0, 0, 0
+    for idx in sorted(page_indices, key=lambda i: pages[i].shape[0], reverse=True):
+        height, width = pages[idx].shape[:2]
+        if x + width > MOSAIC_SIZE:  # start the next shelf
+            x, y, row_height = 0, y + row_height + MOSAIC_GUTTER, 0
+        if y + height > MOSAIC_SIZE:  # canvas full, start a new one
+            layouts.append(tiles)
+            tiles, x, y, row_height = [], 0, 0, 0
+        tiles.append((idx, x, y))
+        x += width + MOSAIC_GUTTER
+        row_height = max(row_height, height)
+    if tiles:
+        layouts.append(tiles)
+    
+    mosaics = []
+    for tiles in layouts:
+        canvas = np.full((MOSAIC_SIZE, MOSAIC_SIZE, 3), 255, dtype=np.uint8)
+        for idx, x, y in tiles:
+            height, width = pages[idx].shape[:2]
+            canvas[y:y + height, x:x + width] = pages[idx]
+        mosaics.append((canvas, tiles))
+    return mosaics
+
 
 @app.cls(
     gpu="T4",  # T4 GPU is cost-effective for OCR
     image=ocr_image,
     scaledown_window=300,  # Keep container warm for 5 minutes
+    volumes={MODELS_DIR: ocr_models},
 )
 @modal.concurrent(max_inputs=20)  # Handle multiple requests concurrently
 class PaddleOCR:
@@ -41,234 +147,306 @@ class PaddleOCR:
     @modal.enter()
     def load_model(self):
         """Load the OCR model when the container starts"""
+        import queue
+        from concurrent.futures import ThreadPoolExecutor
+        import paddle
         from paddleocr import PaddleOCR as POCREngine
         
         # Initialize PaddleOCR with Russian and English support
         # Using 'cyrillic' lang for Russian text recognition
-        self.ocr_engine = POCREngine(
+        ocr_options = dict(
             use_angle_cls=True,  # Enable text rotation detection
             lang='cyrillic',  # Use Cyrillic (Russian) language model
-            use_gpu=True,
             show_log=False,
             det_db_thresh=0.3,  # Detection threshold
             det_db_box_thresh=0.5,  # Box threshold
-            rec_batch_num=6,  # Batch size for recognition
+            rec_batch_num=32,  # Batch size for recognition
         )
+        
+        # PaddleOCR enables MKL-DNN with a per-shape kernel cache
+        # (set_mkldnn_cache_capacity(10)) for us on CPU
+        cpu_options = dict(use_gpu=False, enable_mkldnn=True, cpu_threads=4)
+        
+        # Pick the device up front: without a CUDA build or a visible device PaddleOCR
+        # quietly falls back to plain CPU inference instead of raising
+        engines = None
+        if paddle.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0:
+            gpu_engines = []
+            try:
+                for _ in range(OCR_ENGINE_POOL_SIZE):
+                    gpu_engines.append(POCREngine(**ocr_options, use_gpu=True))
+                engines = gpu_engines
+            except Exception as e:
+                # Paddle maps CUDA driver/runtime errors to OSError and OOM to MemoryError;
+                # keep serving on CPU rather than failing the container, and release
+                # whatever the engines built so far already allocated on the GPU
+                print(f"GPU initialization failed ({e!r}), falling back to CPU with MKL-DNN")
+                del gpu_engines
+                paddle.device.cuda.empty_cache()
+        else:
+            print("No CUDA device available to paddle, running OCR on CPU with MKL-DNN")
+        
+        if engines is None:
+            engines = [
+                POCREngine(**ocr_options, **cpu_options)
+                for _ in range(OCR_ENGINE_POOL_SIZE)
+            ]
+        
+        self.engine_pool = queue.Queue()
+        for engine in engines:
+            self.engine_pool.put(engine)
+        
+        # cv2.imdecode releases the GIL, so upcoming images decode on these threads
+        # while the current one is on the GPU
+        self.decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS)
         print("PaddleOCR model loaded successfully with Cyrillic (Russian) support!")
     
-    @modal.method()
-    def extract_text(self, image_bytes: bytes, filename: str = "image") -> dict:
+    @contextmanager
+    def _borrow_engine(self):
+        """Check out an idle engine from the pool for the duration of one OCR call"""
+        engine = self.engine_pool.get()
+        try:
+            yield engine
+        finally:
+            self.engine_pool.put(engine)
+    
+    def _decode_all(self, images: List[dict]):
         """
-        Extract text from a single image
+        Decode images on the decode pool, yielding (image_array, error) in input order
+        
+        At most DECODE_WORKERS decodes are in flight, so a slow consumer holds a few
+        decoded images at a time instead of the whole batch (Executor.map submits
+        everything up front)
+        """
+        from collections import deque
+        
+        pending = deque()
+        for img_data in images:
+            pending.append(self.decode_pool.submit(_decode_or_none, img_data.get("image_bytes")))
+            if len(pending) >= DECODE_WORKERS:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    
+    def _ocr_array(self, image_array, cls: bool) -> dict:
+        """OCR one decoded image into the 'text', 'confidence' and 'num_lines' result fields"""
+        # Result format: [[[bbox], (text, confidence)], ...]
+        with self._borrow_engine() as engine:
+            results = engine.ocr(image_array, cls=cls)
+        
+        texts, confidences = _split_lines(results[0] if results and results[0] else [])
+        return {
+            "text": " ".join(texts),
+            "confidence": float(confidences.mean()) if confidences.size else 0.0,
+            "num_lines": len(texts)
+        }
+    
+    def _detect_pages(self, engine, pages: list) -> list:
+        """
+        Run text detection on every page; small pages are packed into mosaics so
+        several of them share one detector forward pass
         
-        Args:
-            image_bytes: Image content as bytes
-            filename: Optional filename for reference
-            
         Returns:
-            dict with 'filename', 'text', and 'confidence' keys
+            For each page, an (N, 4, 2) float32 array of its detected boxes in page
+            coordinates (sorted_boxes() needs an array, not a list)
         """
         import numpy as np
-        from PIL import Image
         
-        try:
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if necessary (PaddleOCR works best with RGB)
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Convert PIL Image to numpy array
-            image_array = np.array(image)
-            
-            # Perform OCR
-            # Result format: [[[bbox], (text, confidence)], ...]
-            results = self.ocr_engine.ocr(image_array, cls=True)
-            
-            if not results or not results[0]:
-                return {
-                    "filename": filename,
-                    "text": "",
-                    "confidence": 0.0,
-                    "num_lines": 0
-                }
+        page_boxes = [None] * len(pages)
+        small = [i for i, page in enumerate(pages) if max(page.shape[:2]) <= MOSAIC_TILE_MAX]
+        mosaics = _pack_mosaics(pages, small) if len(small) >= MOSAIC_MIN_TILES else []
+        
+        for canvas, tiles in mosaics:
+            if len(tiles) < MOSAIC_MIN_TILES:
+                continue  # a nearly empty canvas isn't worth it; detect these pages alone
             
-            # Extract text and calculate average confidence
-            texts = []
-            confidences = []
+            dt_boxes, _ = engine.text_detector(canvas)
+            tile_boxes = {idx: [] for idx, _, _ in tiles}
             
-            for line in results[0]:
-                if line:
-                    text = line[1][0]  # Text is at index [1][0]
-                    confidence = line[1][1]  # Confidence is at index [1][1]
-                    texts.append(text)
-                    confidences.append(confidence)
+            # Hand each box to the tile containing its center, in that tile's frame
+            for box in dt_boxes if dt_boxes is not None else []:
+                center_x, center_y = box.mean(axis=0)
+                for idx, x, y in tiles:
+                    height, width = pages[idx].shape[:2]
+                    if x <= center_x < x + width and y <= center_y < y + height:
+                        local = box - np.array([x, y], dtype=box.dtype)
+                        local[:, 0] = np.clip(local[:, 0], 0, width - 1)
+                        local[:, 1] = np.clip(local[:, 1], 0, height - 1)
+                        tile_boxes[idx].append(local)
+                        break
             
-            combined_text = " ".join(texts)
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+            for idx, boxes in tile_boxes.items():
+                page_boxes[idx] = np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+        
+        for idx, page in enumerate(pages):
+            if page_boxes[idx] is None:
+                dt_boxes, _ = engine.text_detector(page)
+                if dt_boxes is None:
+                    dt_boxes = np.zeros((0, 4, 2), dtype=np.float32)
+                page_boxes[idx] = dt_boxes
+        
+        return page_boxes
+    
+    def _ocr_pages(self, engine, pages: list, cls: bool = True) -> List[List[tuple]]:
+        """
+        OCR several decoded pages: detection runs per page (or per mosaic of small
+        pages), then the angle classifier and recognizer each run once over the line
+        crops of all pages together
+        
+        Args:
+            engine: PaddleOCR engine borrowed from the pool
+            pages: Decoded page arrays (see _decode_or_none)
+            cls: Whether to run the angle classifier on the crops
             
-            return {
-                "filename": filename,
-                "text": combined_text,
-                "confidence": avg_confidence,
-                "num_lines": len(texts)
-            }
+        Returns:
+            For each page, its (text, confidence) lines in reading order
+        """
+        import copy
+        from tools.infer.predict_system import sorted_boxes
+        from tools.infer.utility import get_rotate_crop_image
+        
+        # Phase 1: detect text boxes on every page and cut out the line crops,
+        # remembering which page each crop came from
+        crops = []
+        crop_pages = []
+        for page_idx, (page, boxes) in enumerate(zip(pages, self._detect_pages(engine, pages))):
+            if len(boxes) == 0:
+                continue
+            for box in sorted_boxes(boxes):
+                crops.append(get_rotate_crop_image(page, copy.deepcopy(box)))
+                crop_pages.append(page_idx)
+        
+        page_lines = [[] for _ in pages]
+        if not crops:
+            return page_lines
+        
+        # Phase 2: one classifier / recognizer pass over the crops of all pages,
+        # so the GPU sees full recognition batches instead of one page at a time
+        if cls and engine.use_angle_cls:
+            crops, _, _ = engine.text_classifier(crops)
+        rec_results, _ = engine.text_recognizer(crops)
+        
+        # Scatter results back to their pages, dropping low-confidence lines like ocr() does
+        for page_idx, (text, confidence) in zip(crop_pages, rec_results):
+            if confidence >= engine.drop_score:
+                page_lines[page_idx].append((text, confidence))
+        
+        return page_lines
+    
+    @modal.method()
+    def extract_text(self, image_bytes: bytes, filename: str = "image", enable_cls: bool = False) -> dict:
+        """
+        Extract text from a single image
+        
+        Args:
+            image_bytes: Image content as bytes
+            filename: Optional filename for reference
+            enable_cls: Run the 180° angle classifier on text lines (off for upright scans)
             
-        except Exception as e:
+        Returns:
+            dict with 'filename', 'text', and 'confidence' keys
+        """
+        image_array, error = _decode_or_none(image_bytes)
+        if error:
             return {
                 "filename": filename,
                 "text": "",
                 "confidence": 0.0,
                 "num_lines": 0,
-                "error": str(e)
+                "error": error
             }
+        
+        return {"filename": filename, **self._ocr_array(image_array, enable_cls)}
     
     @modal.method()
     def extract_text_batch(
         self,
-        images: List[dict]  # List of {"filename": str, "image_bytes": bytes}
+        images: List[dict],  # List of {"filename": str, "image_bytes": bytes}
+        enable_cls: bool = False,
     ) -> List[dict]:
         """
         Extract text from multiple images in batch
         
         Args:
             images: List of dicts with 'filename' and 'image_bytes' keys
+            enable_cls: Run the 180° angle classifier on text lines (off for upright scans)
             
         Returns:
             List of dicts with extraction results
         """
-        import numpy as np
-        from PIL import Image
-        
         results = []
         
-        for img_data in images:
+        for img_data, (image_array, error) in zip(images, self._decode_all(images)):
             filename = img_data.get("filename", "unknown")
-            image_bytes = img_data.get("image_bytes")
             
-            if not image_bytes:
+            if error:
                 results.append({
                     "filename": filename,
                     "text": "",
                     "confidence": 0.0,
                     "num_lines": 0,
-                    "error": "No image bytes provided"
-                })
-                continue
-            
-            # Process image directly (same logic as extract_text)
-            try:
-                image = Image.open(io.BytesIO(image_bytes))
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                image_array = np.array(image)
-                
-                ocr_results = self.ocr_engine.ocr(image_array, cls=True)
-                
-                if not ocr_results or not ocr_results[0]:
-                    results.append({
-                        "filename": filename,
-                        "text": "",
-                        "confidence": 0.0,
-                        "num_lines": 0
-                    })
-                    continue
-                
-                texts = []
-                confidences = []
-                
-                for line in ocr_results[0]:
-                    if line:
-                        text = line[1][0]
-                        confidence = line[1][1]
-                        texts.append(text)
-                        confidences.append(confidence)
-                
-                combined_text = " ".join(texts)
-                avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
-                
-                results.append({
-                    "filename": filename,
-                    "text": combined_text,
-                    "confidence": avg_confidence,
-                    "num_lines": len(texts)
-                })
-            except Exception as e:
-                results.append({
-                    "filename": filename,
-                    "text": "",
-                    "confidence": 0.0,
-                    "num_lines": 0,
-                    "error": str(e)
+                    "error": error
                 })
+            else:
+                results.append({"filename": filename, **self._ocr_array(image_array, enable_cls)})
         
         return results
     
     @modal.method()
     def extract_text_combined(
         self,
-        images: List[dict]  # List of {"filename": str, "image_bytes": bytes}
+        images: List[dict],  # List of {"filename": str, "image_bytes": bytes}
+        enable_cls: bool = False,
     ) -> dict:
         """
         Extract text from multiple images and combine them
         
         Args:
             images: List of dicts with 'filename' and 'image_bytes' keys
+            enable_cls: Run the 180° angle classifier on text lines (off for upright scans)
             
         Returns:
             dict with combined text and overall statistics
         """
         import numpy as np
-        from PIL import Image
         
-        # Process all images
         all_texts = []
         all_confidences = []
         total_lines = 0
         errors = []
         
-        for img_data in images:
+        # Decode all images first
+        pages = []
+        page_names = []
+        for img_data, (image_array, error) in zip(images, self._decode_all(images)):
             filename = img_data.get("filename", "unknown")
-            image_bytes = img_data.get("image_bytes")
             
-            if not image_bytes:
-                errors.append(f"{filename}: No image bytes provided")
+            if error:
+                errors.append(f"{filename}: {error}")
                 continue
             
-            try:
-                # Process image
-                image = Image.open(io.BytesIO(image_bytes))
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                image_array = np.array(image)
-                
-                ocr_results = self.ocr_engine.ocr(image_array, cls=True)
-                
-                if not ocr_results or not ocr_results[0]:
-                    continue
-                
-                texts = []
-                confidences = []
-                
-                for line in ocr_results[0]:
-                    if line:
-                        text = line[1][0]
-                        confidence = line[1][1]
-                        texts.append(text)
-                        confidences.append(confidence)
-                
-                if texts:
-                    combined_text = " ".join(texts)
-                    all_texts.append(f"--- Page: {filename} ---\n{combined_text}")
-                    all_confidences.extend(confidences)
-                    total_lines += len(texts)
-                    
-            except Exception as e:
-                errors.append(f"{filename}: {str(e)}")
+            pages.append(image_array)
+            page_names.append(filename)
+        
+        # OCR all pages together so recognition is batched across pages
+        try:
+            with self._borrow_engine() as engine:
+                page_lines = self._ocr_pages(engine, pages, cls=enable_cls)
+        except Exception as e:
+            errors.append(f"OCR error: {str(e)}")
+            page_lines = []
+        
+        for filename, lines in zip(page_names, page_lines):
+            if lines:
+                combined_text = " ".join(text for text, _ in lines)
+                all_texts.append(f"--- Page: {filename} ---\n{combined_text}")
+                all_confidences.append(
+                    np.fromiter((confidence for _, confidence in lines), dtype=np.float32, count=len(lines))
+                )
+                total_lines += len(lines)
         
         combined_text = "\n\n".join(all_texts) if all_texts else ""
-        avg_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
+        avg_confidence = float(np.concatenate(all_confidences).mean()) if all_confidences else 0.0
         
         return {
             "combined_text": combined_text,
@@ -278,6 +456,70 @@ class PaddleOCR:
             "errors": errors if errors else None
         }
     
+    @modal.method()
+    def extract_text_combined_stream(
+        self,
+        images: List[dict],  # List of {"filename": str, "image_bytes": bytes}
+        enable_cls: bool = False,
+    ):
+        """
+        Streaming variant of extract_text_combined: yields each page as soon as it is
+        processed, so neither side has to hold the whole combined text in memory
+        
+        Args:
+            images: List of dicts with 'filename' and 'image_bytes' keys
+            enable_cls: Run the 180° angle classifier on text lines (off for upright scans)
+            
+        Yields:
+            dict per image with 'filename', 'text', 'confidence' and 'num_lines' keys
+            (plus 'error' if the image could not be processed), in input order
+        """
+        for img_data, (image_array, error) in zip(images, self._decode_all(images)):
+            filename = img_data.get("filename", "unknown")
+            
+            if error:
+                yield {
+                    "filename": filename,
+                    "text": "",
+                    "confidence": 0.0,
+                    "num_lines": 0,
+                    "error": error
+                }
+            else:
+                yield {"filename": filename, **self._ocr_array(image_array, enable_cls)}
+    
+    @modal.method()
+    def recognize_crops(self, crops: List[bytes]) -> List[dict]:
+        """
+        Recognize already-cropped single text-line images, skipping detection and
+        angle classification; all crops go to the recognizer in one batched call
+        
+        Args:
+            crops: Encoded line images (PNG/JPEG bytes)
+            
+        Returns:
+            List of dicts with 'text' and 'confidence' keys (plus 'error' for
+            crops that could not be decoded), in input order
+        """
+        results = [None] * len(crops)
+        arrays = []
+        indices = []
+        for i, crop_bytes in enumerate(crops):
+            image_array, error = _decode_or_none(crop_bytes)
+            if error:
+                results[i] = {"text": "", "confidence": 0.0, "error": error}
+            else:
+                arrays.append(image_array)
+                indices.append(i)
+        
+        if arrays:
+            with self._borrow_engine() as engine:
+                rec_results, _ = engine.text_recognizer(arrays)
+            for i, (text, confidence) in zip(indices, rec_results):
+                results[i] = {"text": text, "confidence": float(confidence)}
+        
+        return results
+    
     @modal.method()
     def extract_text_from_pdf(self, pdf_bytes: bytes) -> dict:
         """
@@ -290,7 +532,6 @@ class PaddleOCR:
             dict with 'combined_text', 'total_pages', 'total_lines', and 'average_confidence' keys
         """
         import numpy as np
-        from PIL import Image
         import fitz  # PyMuPDF
         
         all_texts = []
@@ -313,40 +554,25 @@ class PaddleOCR:
                     # Render page to image at higher resolution for better OCR
                     # zoom=2.0 gives 144 DPI (default is 72 DPI)
                     mat = fitz.Matrix(2.0, 2.0)
-                    pix = page.get_pixmap(matrix=mat)
-                    
-                    # Convert pixmap to PIL Image
-                    img_bytes = pix.tobytes("png")
-                    image = Image.open(io.BytesIO(img_bytes))
-                    
-                    # Convert to RGB if necessary
-                    if image.mode != 'RGB':
-                        image = image.convert('RGB')
+                    pix = page.get_pixmap(matrix=mat, alpha=False)
                     
-                    # Convert PIL Image to numpy array
-                    image_array = np.array(image)
+                    # Use the raw pixel buffer directly; the page is already rendered
+                    image_array = _pixmap_to_array(pix)
                     
                     # Perform OCR
                     print(f"Processing page {page_num + 1}/{len(pdf_document)}...")
-                    ocr_results = self.ocr_engine.ocr(image_array, cls=True)
+                    with self._borrow_engine() as engine:
+                        ocr_results = engine.ocr(image_array, cls=True)
                     
                     if not ocr_results or not ocr_results[0]:
                         continue
                     
-                    texts = []
-                    confidences = []
-                    
-                    for line in ocr_results[0]:
-                        if line:
-                            text = line[1][0]
-                            confidence = line[1][1]
-                            texts.append(text)
-                            confidences.append(confidence)
+                    texts, confidences = _split_lines(ocr_results[0])
                     
                     if texts:
                         combined_text = " ".join(texts)
                         all_texts.append(f"--- Page {page_num + 1} ---\n{combined_text}")
-                        all_confidences.extend(confidences)
+                        all_confidences.append(confidences)
                         total_lines += len(texts)
                         
                 except Exception as e:
@@ -355,7 +581,7 @@ class PaddleOCR:
             pdf_document.close()
             
             combined_text = "\n\n".join(all_texts) if all_texts else ""
-            avg_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
+            avg_confidence = float(np.concatenate(all_confidences).mean()) if all_confidences else 0.0
             
             return {
                 "combined_text": combined_text,
@@ -375,6 +601,19 @@ class PaddleOCR:
             }
 
 
+@app.function(image=ocr_image, volumes={MODELS_DIR: ocr_models})
+def download_models():
+    """
+    Populate the paddleocr-models volume (run once after the first deploy):
+    modal run modal_ocr.py::download_models
+    """
+    from paddleocr import PaddleOCR as POCREngine
+    
+    POCREngine(use_angle_cls=True, lang='cyrillic', use_gpu=False, show_log=False)
+    ocr_models.commit()
+    print(f"PaddleOCR models saved to the volume at {MODELS_DIR}")
+
+
 @app.function(image=ocr_image)
 @modal.asgi_app()
 def fastapi_app():
@@ -472,3 +711,24 @@ def test_ocr():
     
     if combined_result.get('errors'):
         print(f"\nErrors: {combined_result['errors']}")
+    
+    # Regression check: four small pages share a detector mosaic and one full-size
+    # page is detected alone; both paths must come back with text
+    print("\n" + "="*60)
+    print("Testing mosaic + full-size pages...")
+    print("="*60)
+    
+    small = Image.new('RGB', (400, 200), color='white')
+    ImageDraw.Draw(small).text((20, 20), test_text, fill='black')
+    small_bytes = io.BytesIO()
+    small.save(small_bytes, format='PNG')
+    small_bytes = small_bytes.getvalue()
+    
+    images = [{"filename": f"small{i}.png", "image_bytes": small_bytes} for i in range(4)]
+    images.append({"filename": "full.png", "image_bytes": img_bytes})
+    mixed_result = ocr.extract_text_combined.remote(images)
+    
+    assert not mixed_result.get('errors'), mixed_result.get('errors')
+    for img_data in images:
+        assert f"--- Page: {img_data['filename']} ---" in mixed_result['combined_text'], img_data['filename']
+    print(f"OK: {mixed_result['total_lines']} lines across {mixed_result['total_pages']} pages")
@@ -2,48 +2,62 @@
 Client for using the Modal OCR service
 """
 
+import asyncio
+from functools import lru_cache
+from typing import List, TextIO
+
 import modal
-from typing import List
+
+# Images per remote call when a batch is fanned out across containers
+BATCH_CHUNK_SIZE = 8
+
+
+@lru_cache(maxsize=1)
+def _get_ocr():
+    """Resolve the deployed PaddleOCR class once and reuse the handle for every call"""
+    PaddleOCR = modal.Cls.from_name("paddleocr-service", "PaddleOCR")
+    return PaddleOCR()
 
 
-def extract_text_from_image(image_bytes: bytes, filename: str = "image") -> dict:
+def extract_text_from_image(image_bytes: bytes, filename: str = "image", enable_cls: bool = False) -> dict:
     """
     Extract text from a single image using Modal OCR service
     
     Args:
         image_bytes: Image content as bytes
         filename: Optional filename for reference
+        enable_cls: Run the text-line angle classifier (only needed for rotated scans)
     
     Returns:
         dict with extraction results
     """
-    # Connect to the deployed Modal class
-    PaddleOCR = modal.Cls.from_name("paddleocr-service", "PaddleOCR")
-    ocr = PaddleOCR()
+    ocr = _get_ocr()
     
     # Extract text
     result = ocr.extract_text.remote(
         image_bytes=image_bytes,
-        filename=filename
+        filename=filename,
+        enable_cls=enable_cls,
     )
     
     return result
 
 
 def extract_text_from_images_batch(
-    images: List[tuple[str, bytes]]  # List of (filename, image_bytes)
+    images: List[tuple[str, bytes]],  # List of (filename, image_bytes)
+    enable_cls: bool = False,
 ) -> List[dict]:
     """
     Extract text from multiple images in batch
     
     Args:
         images: List of tuples containing (filename, image_bytes)
+        enable_cls: Run the text-line angle classifier (only needed for rotated scans)
     
     Returns:
         List of dicts with extraction results
     """
-    PaddleOCR = modal.Cls.from_name("paddleocr-service", "PaddleOCR")
-    ocr = PaddleOCR()
+    ocr = _get_ocr()
     
     # Convert to the format expected by the Modal method
     images_data = [
@@ -51,25 +65,59 @@ def extract_text_from_images_batch(
         for filename, image_bytes in images
     ]
     
-    results = ocr.extract_text_batch.remote(images=images_data)
+    results = ocr.extract_text_batch.remote(images=images_data, enable_cls=enable_cls)
     
     return results
 
 
+async def extract_text_from_images_batch_async(
+    images: List[tuple[str, bytes]],  # List of (filename, image_bytes)
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    enable_cls: bool = False,
+) -> List[dict]:
+    """
+    Extract text from many images by sending chunks of them as concurrent remote calls,
+    so Modal can spread a large batch over several containers
+    
+    Args:
+        images: List of tuples containing (filename, image_bytes)
+        chunk_size: Number of images per remote call
+        enable_cls: Run the text-line angle classifier (only needed for rotated scans)
+    
+    Returns:
+        List of dicts with extraction results, in input order
+    """
+    ocr = _get_ocr()
+    
+    images_data = [
+        {"filename": filename, "image_bytes": image_bytes}
+        for filename, image_bytes in images
+    ]
+    chunks = [images_data[i:i + chunk_size] for i in range(0, len(images_data), chunk_size)]
+    
+    chunk_results = await asyncio.gather(*(
+        ocr.extract_text_batch.remote.aio(images=chunk, enable_cls=enable_cls)
+        for chunk in chunks
+    ))
+    
+    return [result for chunk in chunk_results for result in chunk]
+
+
 def extract_text_combined(
-    images: List[tuple[str, bytes]]  # List of (filename, image_bytes)
+    images: List[tuple[str, bytes]],  # List of (filename, image_bytes)
+    enable_cls: bool = False,
 ) -> str:
     """
     Extract text from multiple images and return combined text
     
     Args:
         images: List of tuples containing (filename, image_bytes)
+        enable_cls: Run the text-line angle classifier (only needed for rotated scans)
     
     Returns:
         Combined text from all images
     """
-    PaddleOCR = modal.Cls.from_name("paddleocr-service", "PaddleOCR")
-    ocr = PaddleOCR()
+    ocr = _get_ocr()
     
     # Convert to the format expected by the Modal method
     images_data = [
@@ -77,11 +125,48 @@ def extract_text_combined(
         for filename, image_bytes in images
     ]
     
-    result = ocr.extract_text_combined.remote(images=images_data)
+    result = ocr.extract_text_combined.remote(images=images_data, enable_cls=enable_cls)
     
     return result["combined_text"]
 
 
+def stream_text_combined(
+    images: List[tuple[str, bytes]],  # List of (filename, image_bytes)
+    out: TextIO,
+    enable_cls: bool = False,
+) -> int:
+    """
+    Extract text from multiple images and write it to `out` page by page as results
+    arrive, in the same format as extract_text_combined, without building the whole
+    text in memory
+    
+    Args:
+        images: List of tuples containing (filename, image_bytes)
+        out: Writable text stream (file, StringIO, ...)
+        enable_cls: Run the text-line angle classifier (only needed for rotated scans)
+    
+    Returns:
+        Number of pages with text written to `out`
+    """
+    ocr = _get_ocr()
+    
+    images_data = [
+        {"filename": filename, "image_bytes": image_bytes}
+        for filename, image_bytes in images
+    ]
+    
+    pages_written = 0
+    for page in ocr.extract_text_combined_stream.remote_gen(images=images_data, enable_cls=enable_cls):
+        if not page["text"]:
+            continue
+        if pages_written:
+            out.write("\n\n")
+        out.write(f"--- Page: {page['filename']} ---\n{page['text']}")
+        pages_written += 1
+    
+    return pages_written
+
+
 if __name__ == "__main__":
     # Example usage
     from PIL import Image, ImageDraw